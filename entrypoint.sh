@@ -28,4 +28,4 @@ alembic upgrade head
 
 # Start the application
 echo "Starting application..."
-exec uvicorn src.main:app --host 0.0.0.0 --port 8000
\ No newline at end of file
+exec uvicorn src.main:app --host 0.0.0.0 --port 8000 --loop uvloop --http httptools
\ No newline at end of file
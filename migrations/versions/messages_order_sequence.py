@@ -0,0 +1,70 @@
+"""
+########################################################################
+# AI Prompt Service - migrations/versions/messages_order_sequence.py
+# 
+# Origin: Created as part of the AI Prompt Service project
+# Request: Make Message.order auto-assigned server-side
+# Version: 1.0.0
+# Created: 2026-10-15
+# 
+# Purpose: Back messages.order with a global BIGINT sequence so new
+# messages get their order from Postgres instead of a MAX() query
+#
+# Dependencies: 
+# - alembic
+# - sqlalchemy
+########################################################################
+"""
+"""Server-side default for messages.order
+
+Revision ID: fdffcffdd5b7
+Revises: b89be2da546c
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'fdffcffdd5b7'
+down_revision = 'b89be2da546c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        'messages', 'order',
+        type_=sa.BigInteger,
+        existing_type=sa.Integer,
+        existing_nullable=False,
+    )
+    op.execute('CREATE SEQUENCE messages_order_seq AS BIGINT OWNED BY messages."order"')
+    
+    # Start above every existing value so per-session ordering is preserved
+    op.execute(
+        "SELECT setval('messages_order_seq', "
+        "COALESCE((SELECT MAX(\"order\") FROM messages), 0) + 1, false)"
+    )
+    op.alter_column(
+        'messages', 'order',
+        server_default=sa.text("nextval('messages_order_seq')"),
+        existing_type=sa.BigInteger,
+        existing_nullable=False,
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        'messages', 'order',
+        server_default=None,
+        existing_type=sa.BigInteger,
+        existing_nullable=False,
+    )
+    op.execute('DROP SEQUENCE messages_order_seq')
+    op.alter_column(
+        'messages', 'order',
+        type_=sa.Integer,
+        existing_type=sa.BigInteger,
+        existing_nullable=False,
+    )
@@ -0,0 +1,42 @@
+"""
+########################################################################
+# AI Prompt Service - migrations/versions/messages_session_order_index.py
+# 
+# Origin: Created as part of the AI Prompt Service project
+# Request: Add a composite (session_id, order) index on messages
+# Version: 1.0.0
+# Created: 2026-10-15
+# 
+# Purpose: Replace the single-column session_id index on messages with a
+# composite (session_id, order) index so ordered message fetches use an
+# index scan without a sort
+#
+# Dependencies: 
+# - alembic
+########################################################################
+"""
+"""Composite session/order index on messages
+
+Revision ID: b89be2da546c
+Revises: 849e5b0f89d2
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic
+revision = 'b89be2da546c'
+down_revision = '849e5b0f89d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The composite index also serves session_id-only lookups
+    op.drop_index('ix_messages_session_id', table_name='messages')
+    op.create_index('ix_messages_session_order', 'messages', ['session_id', 'order'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_messages_session_order', table_name='messages')
+    op.create_index('ix_messages_session_id', 'messages', ['session_id'])
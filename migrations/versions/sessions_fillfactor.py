@@ -0,0 +1,45 @@
+"""
+########################################################################
+# AI Prompt Service - migrations/versions/sessions_fillfactor.py
+# 
+# Origin: Created as part of the AI Prompt Service project
+# Request: Lower fillfactor on sessions to leave room for HOT updates
+# Version: 1.0.0
+# Created: 2026-10-15
+# 
+# Purpose: Set fillfactor=70 on sessions, whose updated_at changes on every
+# message, so updates can stay on the same page (HOT) without touching
+# ix_sessions_updated_at. messages stays at the default of 100 since it is
+# insert-only.
+#
+# Dependencies: 
+# - alembic
+########################################################################
+"""
+"""Lower fillfactor on sessions
+
+Revision ID: 83ab85fde0cc
+Revises: 8879044d69ce
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic
+revision = '83ab85fde0cc'
+down_revision = '8879044d69ce'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute('ALTER TABLE sessions SET (fillfactor = 70)')
+    
+    # Rewrite existing pages with the new fillfactor. VACUUM cannot run
+    # inside a transaction and takes an exclusive lock on the table.
+    with op.get_context().autocommit_block():
+        op.execute('VACUUM FULL sessions')
+
+
+def downgrade() -> None:
+    op.execute('ALTER TABLE sessions RESET (fillfactor)')
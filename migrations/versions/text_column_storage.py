@@ -0,0 +1,45 @@
+"""
+########################################################################
+# AI Prompt Service - migrations/versions/text_column_storage.py
+# 
+# Origin: Created as part of the AI Prompt Service project
+# Request: Store long system_prompt and content with a TOAST-friendly layout
+# Version: 1.0.0
+# Created: 2026-10-15
+# 
+# Purpose: Tune TOAST storage for the large text columns (PostgreSQL 16):
+# - messages.content: EXTERNAL (out-of-line, uncompressed) so hot reads
+#   skip decompression
+# - sessions.system_prompt: EXTENDED with lz4, which decompresses much
+#   faster than the default pglz
+#
+# Dependencies: 
+# - alembic
+########################################################################
+"""
+"""TOAST storage for text columns
+
+Revision ID: 8879044d69ce
+Revises: 4d43d5e833e6
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic
+revision = '8879044d69ce'
+down_revision = '4d43d5e833e6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Only affects newly written values; existing rows keep their layout
+    op.execute('ALTER TABLE messages ALTER COLUMN content SET STORAGE EXTERNAL')
+    op.execute('ALTER TABLE sessions ALTER COLUMN system_prompt SET STORAGE EXTENDED')
+    op.execute('ALTER TABLE sessions ALTER COLUMN system_prompt SET COMPRESSION lz4')
+
+
+def downgrade() -> None:
+    op.execute('ALTER TABLE sessions ALTER COLUMN system_prompt SET COMPRESSION DEFAULT')
+    op.execute('ALTER TABLE messages ALTER COLUMN content SET STORAGE EXTENDED')
@@ -0,0 +1,63 @@
+"""
+########################################################################
+# AI Prompt Service - migrations/versions/timestamptz_columns.py
+# 
+# Origin: Created as part of the AI Prompt Service project
+# Request: Switch DateTime columns to TIMESTAMPTZ and use func.now() defaults
+# Version: 1.0.0
+# Created: 2026-10-15
+# 
+# Purpose: Convert created_at/updated_at on sessions and messages to
+# TIMESTAMP WITH TIME ZONE, interpreting existing values as UTC
+#
+# Dependencies: 
+# - alembic
+# - sqlalchemy
+########################################################################
+"""
+"""Timezone-aware timestamp columns
+
+Revision ID: 4d43d5e833e6
+Revises: fdffcffdd5b7
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '4d43d5e833e6'
+down_revision = 'fdffcffdd5b7'
+branch_labels = None
+depends_on = None
+
+# (table, column) pairs converted by this migration
+TIMESTAMP_COLUMNS = [
+    ('sessions', 'created_at'),
+    ('sessions', 'updated_at'),
+    ('messages', 'created_at'),
+]
+
+
+def upgrade() -> None:
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=sa.DateTime(timezone=True),
+            existing_type=sa.DateTime,
+            existing_nullable=False,
+            existing_server_default=sa.func.now(),
+            postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+        )
+
+
+def downgrade() -> None:
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=sa.DateTime,
+            existing_type=sa.DateTime(timezone=True),
+            existing_nullable=False,
+            existing_server_default=sa.func.now(),
+            postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+        )
@@ -8,15 +8,20 @@
 # Created: 2025-04-27
 # 
 # Data Structure Diagram:
-# - Settings: app_name, app_version, app_description, API keys, default models, database settings
+# - Settings: app_name, app_version, app_description, API keys, default models, database settings,
+#   connection pool settings, raw asyncpg pool settings
 #
 # Dependencies:
 # - os
+# - functools
 # - pydantic_settings
 ########################################################################
 """
 import os
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+__all__ = ["Settings", "get_settings", "settings", "SESSION_EXPIRY_HOURS"]
 
 
 class Settings(BaseSettings):
@@ -31,9 +36,28 @@ class Settings(BaseSettings):
     anthropic_api_key: str = os.environ.get("ANTHROPIC_API_KEY", "")
     google_api_key: str = os.environ.get("GOOGLE_API_KEY", "")
     
+    # Semantic response cache (requires sentence-transformers)
+    semantic_cache_enabled: bool = os.environ.get("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+    semantic_cache_model: str = os.environ.get("SEMANTIC_CACHE_MODEL", "all-MiniLM-L6-v2")
+    semantic_cache_threshold: float = float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    semantic_cache_ttl_seconds: float = float(os.environ.get("SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+    semantic_cache_max_entries: int = int(os.environ.get("SEMANTIC_CACHE_MAX_ENTRIES", "1024"))
+    
+    # Upstream AI HTTP client settings (HTTP/2, shared keep-alive pool)
+    ai_http_max_connections: int = int(os.environ.get("AI_HTTP_MAX_CONNECTIONS", "200"))
+    ai_http_max_keepalive_connections: int = int(os.environ.get("AI_HTTP_MAX_KEEPALIVE_CONNECTIONS", "100"))
+    ai_http_keepalive_expiry: float = float(os.environ.get("AI_HTTP_KEEPALIVE_EXPIRY", "30"))
+    ai_http_timeout: float = float(os.environ.get("AI_HTTP_TIMEOUT", "600"))
+    ai_http_connect_timeout: float = float(os.environ.get("AI_HTTP_CONNECT_TIMEOUT", "5"))
+    
     # Default models
     default_claude_model: str = "claude-3-sonnet-20240229"
-    default_gemini_model: str = "gemini-pro"
+    default_gemini_model: str = "gemini-1.5-flash"
+    
+    # Gemini context caching (conversations below the minimum size are sent uncached)
+    gemini_context_cache_min_tokens: int = int(os.environ.get("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "32768"))
+    gemini_context_cache_ttl_seconds: int = int(os.environ.get("GEMINI_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+    gemini_context_cache_size: int = int(os.environ.get("GEMINI_CONTEXT_CACHE_SIZE", "128"))
     
     # PostgreSQL settings
     postgres_user: str = os.environ.get("POSTGRES_USER", "postgres")
@@ -49,17 +73,53 @@ class Settings(BaseSettings):
     )
     db_echo: bool = os.environ.get("DB_ECHO", "false").lower() == "true"
     
+    # Connection pool settings
+    db_pool_size: int = int(os.environ.get("DB_POOL_SIZE", "20"))
+    db_max_overflow: int = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+    db_pool_timeout: int = int(os.environ.get("DB_POOL_TIMEOUT", "30"))
+    db_pool_recycle: int = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+    db_pool_pre_ping: bool = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Raw asyncpg pool settings (hot read paths)
+    db_raw_pool_min_size: int = int(os.environ.get("DB_RAW_POOL_MIN_SIZE", "5"))
+    db_raw_pool_max_size: int = int(os.environ.get("DB_RAW_POOL_MAX_SIZE", "20"))
+    db_statement_cache_size: int = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", "1024"))
+    # Set when connecting through PgBouncer in transaction pooling mode
+    use_pgbouncer: bool = os.environ.get("USE_PGBOUNCER", "false").lower() == "true"
+    # Disable connection pooling entirely (unit tests only)
+    db_null_pool: bool = os.environ.get("DB_NULL_POOL", "false").lower() == "true"
+    
     # Session settings
     session_expiry_hours: int = int(os.environ.get("SESSION_EXPIRY_HOURS", "24"))
     
+    # Health check settings
+    health_check_cache_seconds: float = float(os.environ.get("HEALTH_CHECK_CACHE_SECONDS", "5"))
+    health_check_timeout_seconds: float = float(os.environ.get("HEALTH_CHECK_TIMEOUT_SECONDS", "2"))
+    
+    # Logging settings
+    log_level: str = os.environ.get("LOG_LEVEL", "INFO")
+    # Log POST bodies (requires DEBUG level), truncated to the given size
+    log_request_bodies: bool = os.environ.get("LOG_REQUEST_BODIES", "false").lower() == "true"
+    log_request_body_max_bytes: int = int(os.environ.get("LOG_REQUEST_BODY_MAX_BYTES", "4096"))
+    
     # Testing flag
     testing: bool = os.environ.get("TESTING", "false").lower() == "true"
     
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        extra = "ignore"  # Allow extra fields from environment
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",  # Allow extra fields from environment
+        frozen=True,  # Settings are read-only once loaded
+    )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load settings once per process and return the cached instance."""
+    return Settings()
 
 
 # Create global settings instance
-settings = Settings()
\ No newline at end of file
+settings = get_settings()
+
+# Frequently read values
+SESSION_EXPIRY_HOURS = settings.session_expiry_hours
\ No newline at end of file
@@ -8,31 +8,80 @@
 # Created: 2025-04-27
 # 
 # Data Structure Diagram:
-# - Database connection setup
+# - Database connection setup (pooled engine, tunable via settings)
 # - Database session management
+# - Raw asyncpg pool for hot read paths
+# - Connection pool warm-up
+# - Cleanup leader lock (advisory lock held on a dedicated connection)
 #
 # Dependencies:
+# - asyncio
+# - uuid
 # - sqlalchemy
 # - asyncpg
 # - config
 ########################################################################
 """
+import asyncio
 import os
-from typing import AsyncGenerator
+import uuid
+from typing import AsyncGenerator, Optional
+
+import asyncpg
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.pool import NullPool
 
 from src.config import settings
 
 # Create async engine for PostgreSQL
+#
+# UUID columns use UUID(as_uuid=True), for which the asyncpg dialect installs
+# no bind/result processors: values go straight through asyncpg's built-in
+# binary (C) codec. Do not register a Python-level set_type_codec for uuid,
+# it would replace the C codec with a slower per-value Python call.
 DATABASE_URL = settings.database_url
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=settings.db_echo,
-    future=True,
-    poolclass=NullPool if settings.testing else None,
-)
+
+# Session settings sent on connect. JIT compilation only adds latency to the
+# short OLTP queries this service runs.
+server_settings = {"application_name": settings.app_name}
+
+# PgBouncer in transaction mode cannot route named prepared statements back
+# to the server connection that created them, so disable statement caching
+# and give every prepared statement a unique name. PgBouncer also rejects
+# unknown startup parameters such as jit.
+if settings.use_pgbouncer:
+    connect_args = {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        "server_settings": server_settings,
+    }
+else:
+    server_settings["jit"] = "off"
+    connect_args = {"server_settings": server_settings}
+
+if settings.db_null_pool:
+    # No pooling: every checkout opens a fresh connection (unit tests only)
+    engine = create_async_engine(
+        DATABASE_URL,
+        echo=settings.db_echo,
+        future=True,
+        poolclass=NullPool,
+        connect_args=connect_args,
+    )
+else:
+    engine = create_async_engine(
+        DATABASE_URL,
+        echo=settings.db_echo,
+        future=True,
+        connect_args=connect_args,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
 
 # Create session factory
 async_session_factory = async_sessionmaker(
@@ -41,8 +90,10 @@ async_session_factory = async_sessionmaker(
     class_=AsyncSession
 )
 
-# Create declarative base for models
-Base = declarative_base()
+# Declarative base for models
+class Base(DeclarativeBase):
+    """Declarative base for all database models."""
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
@@ -61,4 +112,105 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.commit()
         except Exception:
             await session.rollback()
-            raise
\ No newline at end of file
+            raise
+
+
+async def warm_pool(n: int) -> None:
+    """
+    Open n engine connections concurrently and return them to the pool.
+    
+    Should be called at application startup so the first requests do not
+    pay the connection handshake cost.
+    """
+    if settings.db_null_pool or n <= 0:
+        return
+    connections = await asyncio.gather(*[engine.connect() for _ in range(n)])
+    await asyncio.gather(*[conn.close() for conn in connections])
+
+
+# Raw asyncpg pool, bypassing the ORM for hot read paths
+raw_pool: Optional[asyncpg.Pool] = None
+
+
+def _raw_dsn(url: str) -> str:
+    """Convert a SQLAlchemy URL into a plain libpq DSN for asyncpg."""
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+async def init_raw_pool() -> asyncpg.Pool:
+    """
+    Create the process-wide asyncpg pool.
+    
+    Should be called once at application startup. asyncpg opens min_size
+    connections eagerly, so the pool is warm once this returns.
+    """
+    global raw_pool
+    if raw_pool is None:
+        raw_pool = await asyncpg.create_pool(
+            dsn=_raw_dsn(DATABASE_URL),
+            min_size=settings.db_raw_pool_min_size,
+            max_size=settings.db_raw_pool_max_size,
+            statement_cache_size=0 if settings.use_pgbouncer else settings.db_statement_cache_size,
+            server_settings=server_settings,
+        )
+    return raw_pool
+
+
+async def close_raw_pool() -> None:
+    """Close the process-wide asyncpg pool if it was created."""
+    global raw_pool
+    if raw_pool is not None:
+        await raw_pool.close()
+        raw_pool = None
+
+
+async def get_raw_pg() -> AsyncGenerator[asyncpg.Connection, None]:
+    """
+    Get a raw asyncpg connection for dependency injection.
+    
+    Intended for read-only queries on hot paths; statements are prepared
+    and cached per connection by asyncpg.
+    """
+    pool = await init_raw_pool()
+    async with pool.acquire() as conn:
+        yield conn
+
+
+# Advisory lock key electing the one worker that runs stale-session cleanup
+CLEANUP_LOCK_KEY = 0x5E5510_C1EA
+
+
+async def acquire_cleanup_lock() -> Optional[asyncpg.Connection]:
+    """
+    Try to become the worker that runs stale-session cleanup.
+    
+    Opens a dedicated connection, outside both pools, and takes an advisory
+    lock on it. The lock is held for as long as the connection stays open,
+    so one worker runs cleanup until it exits (or its connection drops) and
+    the others skip it. PgBouncer in transaction mode does not keep
+    session-level locks on one server connection, so there the lock is taken
+    inside a transaction that stays open instead.
+    
+    Returns:
+        The connection holding the lock (close it to release the lock), or
+        None if another worker holds it
+    """
+    conn = await asyncpg.connect(
+        dsn=_raw_dsn(DATABASE_URL),
+        statement_cache_size=0 if settings.use_pgbouncer else settings.db_statement_cache_size,
+        server_settings=server_settings,
+    )
+    try:
+        if settings.use_pgbouncer:
+            await conn.execute("BEGIN")
+            acquired = await conn.fetchval("SELECT pg_try_advisory_xact_lock($1)", CLEANUP_LOCK_KEY)
+        else:
+            acquired = await conn.fetchval("SELECT pg_try_advisory_lock($1)", CLEANUP_LOCK_KEY)
+    except BaseException:
+        await conn.close()
+        raise
+    
+    if not acquired:
+        await conn.close()
+        return None
+    return conn
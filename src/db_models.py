@@ -12,62 +12,128 @@
 # |         Session         |     |         Message         |
 # +-------------------------+     +-------------------------+
 # | id: UUID               |<>---| id: UUID                |
-# | ai_provider: String    |     | session_id: UUID        |
+# | ai_provider: Enum      |     | session_id: UUID        |
 # | model: String          |     | role: String            |
 # | system_prompt: String  |     | content: Text           |
-# | created_at: DateTime   |     | created_at: DateTime    |
-# | updated_at: DateTime   |     | order: Integer          |
+# | created_at: DateTimeTZ |     | created_at: DateTimeTZ  |
+# | updated_at: DateTimeTZ |     | order: BigInteger       |
 # +-------------------------+     +-------------------------+
 #
 # Dependencies:
+# - os
+# - time
 # - sqlalchemy
 # - uuid
 # - datetime
 # - database
+# - models
 ########################################################################
 """
+import os
+import time
 import uuid
 from datetime import datetime
 from typing import List
 
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, func
+from sqlalchemy import Enum, String, Text, DateTime, ForeignKey, BigInteger, Index, DDL, Sequence, event, func
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.database import Base
+from src.models import AIProvider
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Generate a time-ordered UUIDv7 (RFC 9562).
+    
+    The 48-bit millisecond timestamp prefix makes new primary keys land on
+    the rightmost btree pages instead of scattering like uuid4.
+    """
+    timestamp_ms = time.time_ns() // 1_000_000
+    value = (timestamp_ms & 0xFFFFFFFFFFFF) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122 variant
+    return uuid.UUID(int=value)
 
 
 class Session(Base):
     """Database model for a conversation session."""
     __tablename__ = "sessions"
+    __table_args__ = (
+        # Serves the stale-session cleanup scan. This cannot be a partial
+        # index on "updated_at < now() - interval ..." because index
+        # predicates must be immutable and now() is not.
+        Index("ix_sessions_updated_at", "updated_at"),
+    )
+    # Fetch database-generated timestamps with RETURNING after INSERT/UPDATE
+    __mapper_args__ = {"eager_defaults": True}
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    ai_provider = Column(String(50), nullable=False)
-    model = Column(String(100), nullable=False)
-    system_prompt = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    # Stored as the enum's value in the existing VARCHAR column, loaded as AIProvider
+    ai_provider: Mapped[AIProvider] = mapped_column(
+        Enum(
+            AIProvider,
+            native_enum=False,
+            length=50,
+            values_callable=lambda enum_cls: [member.value for member in enum_cls],
+        ),
+        nullable=False,
+    )
+    model: Mapped[str] = mapped_column(String(100), nullable=False)
+    system_prompt: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
-    # Relationship to messages
-    messages = relationship("Message", back_populates="session", cascade="all, delete-orphan", order_by="Message.order")
+    # Relationship to messages; deletes rely on the FK's ON DELETE CASCADE
+    # instead of loading and deleting each child row. Implicit lazy loads
+    # raise, so callers must load messages explicitly (e.g. selectinload).
+    messages: Mapped[List["Message"]] = relationship(
+        back_populates="session",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="Message.order",
+        lazy="raise_on_sql",
+    )
     
     def __repr__(self):
         return f"<Session(id={self.id}, ai_provider={self.ai_provider}, model={self.model})>"
 
 
+# updated_at is rewritten on every message; free space per page lets those
+# become HOT updates that skip index maintenance
+event.listen(
+    Session.__table__,
+    "after_create",
+    DDL("ALTER TABLE sessions SET (fillfactor = 70)").execute_if(dialect="postgresql"),
+)
+
+
+# Global message order; declared on the metadata so create_all() creates it
+# before the messages table (migrations create it explicitly)
+messages_order_seq = Sequence("messages_order_seq", data_type=BigInteger, metadata=Base.metadata)
+
+
 class Message(Base):
     """Database model for a message in a conversation."""
     __tablename__ = "messages"
+    __table_args__ = (
+        # Serves ordered message fetches per session without a sort
+        Index("ix_messages_session_order", "session_id", "order"),
+    )
+    # Fetch database-generated created_at/order with RETURNING after INSERT
+    __mapper_args__ = {"eager_defaults": True}
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    session_id = Column(UUID(as_uuid=True), ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False)
-    role = Column(String(50), nullable=False)  # 'human' or 'assistant'
-    content = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    order = Column(Integer, nullable=False)  # To maintain message order
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    session_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False)
+    role: Mapped[str] = mapped_column(String(50), nullable=False)  # 'human' or 'assistant'
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # To maintain message order; assigned by Postgres from a global sequence
+    order: Mapped[int] = mapped_column(BigInteger, server_default=messages_order_seq.next_value(), nullable=False)
     
     # Relationship to session
-    session = relationship("Session", back_populates="messages")
+    session: Mapped["Session"] = relationship(back_populates="messages")
     
     def __repr__(self):
         return f"<Message(id={self.id}, role={self.role}, session_id={self.session_id})>"
\ No newline at end of file
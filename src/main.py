@@ -16,6 +16,7 @@
 #   - DELETE /api/sessions/{session_id}: Delete session
 #   - POST /api/sessions/{session_id}/messages: Add message to session
 #   - GET /health: Health check
+#   - GET /api/docs, /api/redoc, /api/openapi.json: API documentation
 #
 # Dependencies:
 # - fastapi
@@ -25,35 +26,46 @@
 # - services module
 # - config module
 # - database module
+# - asyncpg
+# - orjson
 ########################################################################
 """
 import logging
 import time
 import uuid
 import asyncio
-from fastapi import FastAPI, HTTPException, Depends, Request, status, BackgroundTasks
+from secrets import token_hex
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, status, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
+from fastapi.responses import HTMLResponse, ORJSONResponse, RedirectResponse, Response, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from typing import Dict, Any, Optional, List
-import traceback
+from typing import Dict, Any, Optional, List, AsyncIterator, Callable
+import asyncpg
+import orjson
 
 from src.models import (
-    PromptRequest, PromptResponse, AIProvider, 
+    PromptRequest, PromptResponse, AIProvider, Message,
     SessionCreate, SessionResponse, SessionUpdate,
-    MessageCreate, MessageResponse
+    MessageCreate
 )
+from src.services.ai_service import AIService
 from src.services.claude_service import ClaudeService
 from src.services.gemini_service import GeminiService
+from src.services.semantic_cache_service import CachedAIService, load_semantic_cache
 from src.services.session_service import SessionService
-from src.config import settings
-from src.database import get_db, async_session_factory
+from src.config import settings, SESSION_EXPIRY_HOURS
+from src.database import (
+    engine, get_db, get_raw_pg, async_session_factory,
+    init_raw_pool, close_raw_pool, warm_pool, acquire_cleanup_lock
+)
 
 # Configure logging
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=settings.log_level.upper(),
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
 logger = logging.getLogger(__name__)
@@ -67,9 +79,11 @@ app = FastAPI(
     title=settings.app_name,
     description=settings.app_description,
     version=settings.app_version,
-    docs_url="/api/docs",
-    redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json",
+    # Docs routes are defined below so the spec is served pre-serialized
+    docs_url=None,
+    redoc_url=None,
+    openapi_url=None,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
@@ -84,20 +98,34 @@ app.add_middleware(
 # Initialize services
 session_service = SessionService()
 
+# Frequently polled, low-value paths that are not logged
+_SKIP_LOG_PATHS = frozenset({"/health", "/api/docs", "/api/redoc", "/api/openapi.json"})
+
+
 # Middleware for request logging
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    request_id = str(uuid.uuid4())
+    if request.scope["path"] in _SKIP_LOG_PATHS:
+        return await call_next(request)
+    
+    request_id = token_hex(8)
     logger.info(f"Request {request_id} started: {request.method} {request.url.path}")
     
-    # Try to log request body for POST requests
-    if request.method == "POST":
+    # Log POST bodies only when explicitly enabled; reading the body here
+    # buffers it in full before the endpoint parses it
+    if (
+        request.method == "POST"
+        and settings.log_request_bodies
+        and logger.isEnabledFor(logging.DEBUG)
+    ):
         try:
             body = await request.body()
             if body:
-                # Clone the request to read the body
-                body_str = body.decode()
-                logger.debug(f"Request {request_id} body: {body_str}")
+                snippet = body[:settings.log_request_body_max_bytes]
+                logger.debug(
+                    "Request %s body (%d bytes): %s",
+                    request_id, len(body), snippet.decode(errors="replace")
+                )
                 # Create a new body stream
                 request._body = body
         except Exception as e:
@@ -118,63 +146,177 @@ async def log_requests(request: Request, call_next):
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """Handle validation errors with a clean response."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-        content={"detail": "Validation error", "errors": exc.errors()},
+        # Errors raised by validators carry the exception object in ctx
+        content={"detail": "Validation error", "errors": jsonable_encoder(exc.errors())},
     )
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """Handle general exceptions with a clean response."""
-    logger.error(f"Unhandled exception: {str(exc)}")
-    logger.error(traceback.format_exc())
-    return JSONResponse(
+    logger.error(f"Unhandled exception: {str(exc)}", exc_info=exc)
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"detail": "An unexpected error occurred"}
     )
 
+# Monotonic time of the last successful database health check
+_last_db_ok = float("-inf")
+
+# Constructors for each supported AI provider
+_AI_SERVICE_FACTORIES: Dict[AIProvider, Callable[[], AIService]] = {
+    AIProvider.CLAUDE: lambda: ClaudeService(api_key=settings.anthropic_api_key),
+    AIProvider.GEMINI: lambda: GeminiService(api_key=settings.google_api_key),
+}
+
+# AI service instances, created on first use and reused across requests
+_ai_services: Dict[AIProvider, AIService] = {}
+
+
 # Service factory to get the appropriate AI service
-def get_ai_service(ai_provider: AIProvider):
+def get_ai_service(ai_provider: AIProvider) -> AIService:
     """Factory function to get the appropriate AI service based on the provider."""
-    if ai_provider == AIProvider.CLAUDE:
-        return ClaudeService(api_key=settings.anthropic_api_key)
-    elif ai_provider == AIProvider.GEMINI:
-        return GeminiService(api_key=settings.google_api_key)
-    else:
+    try:
+        return _ai_services[ai_provider]
+    except KeyError:
+        pass
+    
+    factory = _AI_SERVICE_FACTORIES.get(ai_provider)
+    if factory is None:
         raise ValueError(f"Unsupported AI provider: {ai_provider}")
+    
+    # Built lazily so a missing API key only fails requests for that provider;
+    # the semantic cache encoder is already loaded at startup
+    service = factory()
+    if settings.semantic_cache_enabled:
+        service = CachedAIService(service)
+    _ai_services[ai_provider] = service
+    return service
+
+async def stream_events(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Format streamed response text as server-sent events."""
+    try:
+        async for chunk in chunks:
+            yield f"data: {orjson.dumps({'text': chunk}).decode()}\n\n"
+    except Exception as e:
+        # Headers are already sent, so report the failure in-band
+        logger.error(f"Error streaming AI response: {str(e)}")
+        yield f"event: error\ndata: {orjson.dumps({'detail': str(e)}).decode()}\n\n"
+        return
+    yield "event: done\ndata: {}\n\n"
+
+
+async def stream_and_persist(
+    service: AIService,
+    request: PromptRequest,
+    session_id: uuid.UUID
+) -> AsyncIterator[str]:
+    """Stream a session reply, then persist the turn once the stream completes."""
+    parts = []
+    async for chunk in service.generate_response_stream(request):
+        parts.append(chunk)
+        yield chunk
+    
+    async with async_session_factory() as db:
+        await session_service.add_messages(db, session_id, [
+            ("human", request.human_input),
+            ("assistant", "".join(parts)),
+        ])
+        await db.commit()
+
+
+async def cleanup_pass() -> None:
+    """Run one stale-session purge."""
+    try:
+        async with async_session_factory() as db:
+            count = await session_service.cleanup_old_sessions(db, SESSION_EXPIRY_HOURS)
+            await db.commit()
+        
+        logger.info(f"Successfully cleaned up {count} old sessions (older than {SESSION_EXPIRY_HOURS} hours)")
+    except Exception as e:
+        logger.error(f"Error in cleanup task: {str(e)}")
+
 
 # Background task to cleanup old sessions
 async def cleanup_old_sessions():
-    """Background task to cleanup old sessions periodically."""
+    """
+    Background task to cleanup old sessions periodically.
+    
+    Only the worker holding the cleanup lock runs passes; the others check
+    back every hour and take over if the holder has gone away.
+    """
     while True:
         try:
-            # Create a session using the session factory directly
-            db = async_session_factory()
-            try:
-                await session_service.cleanup_old_sessions(db)
-                await db.commit()
-            except Exception as e:
-                await db.rollback()
-                raise
-            finally:
-                await db.close()
-            
-            logger.info(f"Successfully cleaned up old sessions (older than {settings.session_expiry_hours} hours)")
+            lock_conn = await acquire_cleanup_lock()
         except Exception as e:
-            logger.error(f"Error in cleanup task: {str(e)}")
+            logger.error(f"Error acquiring session cleanup lock: {str(e)}")
+            lock_conn = None
         
-        # Sleep for 1 hour before next cleanup
-        await asyncio.sleep(3600)
+        if lock_conn is None:
+            logger.debug("Skipped session cleanup: another worker is running it")
+            await asyncio.sleep(3600)
+            continue
+        
+        try:
+            # asyncpg marks the connection closed if it drops, releasing the lock
+            while not lock_conn.is_closed():
+                await cleanup_pass()
+                
+                # Sleep for 1 hour before next cleanup
+                await asyncio.sleep(3600)
+        finally:
+            await lock_conn.close()
 
 
 @app.on_event("startup")
 async def startup_event():
     """Startup event handler."""
-    # Start background task for session cleanup
-    asyncio.create_task(cleanup_old_sessions())
+    # Serialize the OpenAPI spec once; every docs page load fetches it
+    app.state.openapi_bytes = orjson.dumps(app.openapi())
+    
+    # Load the semantic cache encoder now, off the event loop: a missing
+    # dependency fails the boot instead of every request, and cached services
+    # built on first use find the model already loaded
+    if settings.semantic_cache_enabled:
+        await load_semantic_cache()
+        logger.info(f"Loaded semantic cache model {settings.semantic_cache_model}")
+    
+    # Pre-open engine connections (so the first requests skip the handshake)
+    # and create the raw asyncpg pool used by hot read paths, concurrently
+    app.state.pg_pool, _ = await asyncio.gather(
+        init_raw_pool(),
+        warm_pool(settings.db_pool_size),
+    )
+    logger.info(f"Warmed database pool with {settings.db_pool_size} connections")
+    logger.info("Initialized raw asyncpg pool")
+    
+    # Start background task for session cleanup; its first pass runs
+    # immediately. Keep a reference so the task is not garbage collected.
+    app.state.cleanup_task = asyncio.create_task(cleanup_old_sessions())
     logger.info("Started background session cleanup task")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Shutdown event handler."""
+    cleanup_task = getattr(app.state, "cleanup_task", None)
+    if cleanup_task is not None:
+        cleanup_task.cancel()
+        try:
+            await cleanup_task
+        except asyncio.CancelledError:
+            pass
+    
+    await close_raw_pool()
+    logger.info("Closed raw asyncpg pool")
+    
+    # Release HTTP clients held by cached AI services
+    for service in _ai_services.values():
+        await service.aclose()
+    _ai_services.clear()
+
+
 # Ad hoc mode endpoint
 @app.post(
     "/api/prompt", 
@@ -213,6 +355,7 @@ async def generate_prompt_response(request: PromptRequest):
     - **ai_provider**: The AI provider to use (claude or gemini)
     - **model**: Specific model to use (optional)
     - **parameters**: Additional parameters for the AI request (optional)
+    - **stream**: Stream the response as server-sent events (optional)
     
     Example:
     ```json
@@ -235,33 +378,43 @@ async def generate_prompt_response(request: PromptRequest):
     try:
         # Log request details
         logger.info(f"Received prompt request: AI Provider={request.ai_provider}, Model={request.model or 'default'}")
-        logger.debug(f"Request details: {request.dict()}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Request details: %s", request.model_dump())
         
         # Get the appropriate service
         service = get_ai_service(request.ai_provider)
         logger.info(f"Using service: {service.__class__.__name__}")
         
+        if request.stream:
+            logger.info(f"Streaming response from {request.ai_provider}...")
+            return StreamingResponse(
+                stream_events(service.generate_response_stream(request)),
+                media_type="text/event-stream"
+            )
+        
         # Generate response
         logger.info(f"Generating response from {request.ai_provider}...")
         response = await service.generate_response(request)
         
         # Log success
         logger.info(f"Successfully generated response from {request.ai_provider}")
-        logger.debug(f"Response details: {response.dict()}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Response details: %s", response.model_dump())
         
         return response
     except ValueError as e:
         # Handle specific value errors
         logger.error(f"Value error in prompt request: {str(e)}")
         logger.error(f"Request data: AI Provider={request.ai_provider}, Model={request.model or 'default'}")
-        logger.debug(f"Full request: {request.dict()}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Full request: %s", request.model_dump())
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         # Handle unexpected errors
-        logger.error(f"Error generating AI response: {str(e)}")
+        logger.exception(f"Error generating AI response: {str(e)}")
         logger.error(f"Request data: AI Provider={request.ai_provider}, Model={request.model or 'default'}")
-        logger.debug(f"Full request: {request.dict()}")
-        logger.error(traceback.format_exc())
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Full request: %s", request.model_dump())
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
             detail=f"Error generating AI response: {str(e)}"
@@ -294,16 +447,8 @@ async def create_session(
         # Create new session
         session = await session_service.create_session(db, session_data)
         
-        # Convert to response model
-        return SessionResponse(
-            id=session.id,
-            ai_provider=session.ai_provider,
-            model=session.model,
-            system_prompt=session.system_prompt,
-            created_at=session.created_at,
-            updated_at=session.updated_at,
-            messages=[]  # No messages yet
-        )
+        # Convert to response model (no messages yet)
+        return SessionResponse.model_validate(session)
     except Exception as e:
         logger.error(f"Error creating session: {str(e)}")
         raise HTTPException(
@@ -317,45 +462,38 @@ async def create_session(
     response_model=SessionResponse,
     tags=["Session Mode"],
     summary="Get session details",
-    description="Get details of an existing conversation session including all messages."
+    description="Get details of an existing conversation session including its messages, optionally paginated."
 )
 async def get_session(
     session_id: uuid.UUID,
-    db: AsyncSession = Depends(get_db)
+    # Orders assigned before the sequence migration start at 0, hence -1
+    after: int = Query(-1, ge=-1, description="Return messages after this order value (from the previous page)"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Maximum number of messages to return"),
+    conn: asyncpg.Connection = Depends(get_raw_pg)
 ):
     """
-    Get details of an existing conversation session including all messages.
+    Get details of an existing conversation session including its messages.
     
     - **session_id**: The ID of the session to retrieve
+    - **after**: Return messages after this order value (optional)
+    - **limit**: Maximum number of messages to return (optional, all by default)
     """
-    # Get session
-    session = await session_service.get_session(db, session_id)
+    # Get session (raw asyncpg read path)
+    session = await session_service.fetch_session(conn, session_id)
     if not session:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
     
     # Get messages
-    messages = await session_service.get_messages_for_session(db, session_id)
+    messages = await session_service.fetch_messages(conn, session_id, after, limit)
     
-    # Convert to response models
-    message_responses = [
-        MessageResponse(
-            id=msg.id,
-            role=msg.role,
-            content=msg.content,
-            created_at=msg.created_at
-        )
-        for msg in messages
-    ]
-    
-    # Return session response
-    return SessionResponse(
-        id=session.id,
-        ai_provider=session.ai_provider,
-        model=session.model,
-        system_prompt=session.system_prompt,
-        created_at=session.created_at,
-        updated_at=session.updated_at,
-        messages=message_responses
+    # The rows map one-to-one onto SessionResponse, so serialize them with
+    # orjson directly instead of validating and re-dumping through pydantic
+    return Response(
+        content=orjson.dumps(
+            {**dict(session), "messages": [dict(msg) for msg in messages]},
+            option=orjson.OPT_UTC_Z,
+        ),
+        media_type="application/json",
     )
 
 
@@ -378,35 +516,13 @@ async def update_session(
     - **system_prompt**: Updated system prompt (optional)
     - **model**: Updated model (optional)
     """
-    # Update session
+    # Update session (messages are loaded along with it)
     session = await session_service.update_session(db, session_id, update_data)
     if not session:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
     
-    # Get messages
-    messages = await session_service.get_messages_for_session(db, session_id)
-    
-    # Convert to response models
-    message_responses = [
-        MessageResponse(
-            id=msg.id,
-            role=msg.role,
-            content=msg.content,
-            created_at=msg.created_at
-        )
-        for msg in messages
-    ]
-    
-    # Return session response
-    return SessionResponse(
-        id=session.id,
-        ai_provider=session.ai_provider,
-        model=session.model,
-        system_prompt=session.system_prompt,
-        created_at=session.created_at,
-        updated_at=session.updated_at,
-        messages=message_responses
-    )
+    # Convert to response model
+    return SessionResponse.model_validate(session)
 
 
 @app.delete(
@@ -443,8 +559,7 @@ async def delete_session(
 )
 async def send_message(
     session_id: uuid.UUID,
-    message_data: MessageCreate,
-    db: AsyncSession = Depends(get_db)
+    message_data: MessageCreate
 ):
     """
     Send a message in an existing session and get an AI response.
@@ -452,24 +567,26 @@ async def send_message(
     - **session_id**: The ID of the session
     - **content**: The human message content
     - **parameters**: Additional parameters for the AI request (optional)
+    - **stream**: Stream the response as server-sent events (optional)
     """
+    # Database sessions are opened only around the DB work so no pooled
+    # connection is held while waiting on the AI provider
     try:
-        # Get session
-        session = await session_service.get_session(db, session_id)
-        if not session:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
-        
-        # Get messages for conversation history
-        db_messages = await session_service.get_messages_for_session(db, session_id)
+        async with async_session_factory() as db:
+            # Get session together with its conversation history
+            session = await session_service.get_session_with_messages(db, session_id)
+            if not session:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
         
         # Convert to conversation history format
         conversation_history = [
-            {"role": msg.role, "content": msg.content}
-            for msg in db_messages
+            Message.model_construct(role=msg.role, content=msg.content)
+            for msg in session.messages
         ]
         
-        # Create prompt request
-        request = PromptRequest(
+        # Create prompt request. The inputs are already validated (stored
+        # session rows and the parsed MessageCreate), so skip re-validation.
+        request = PromptRequest.model_construct(
             system_prompt=session.system_prompt,
             human_input=message_data.content,
             conversation_history=conversation_history,
@@ -479,14 +596,25 @@ async def send_message(
         )
         
         # Get AI service
-        service = get_ai_service(AIProvider(session.ai_provider))
+        service = get_ai_service(session.ai_provider)
+        
+        if message_data.stream:
+            # Messages are persisted after the stream has been fully sent
+            return StreamingResponse(
+                stream_events(stream_and_persist(service, request, session_id)),
+                media_type="text/event-stream"
+            )
         
         # Generate response
         response = await service.generate_response(request)
         
         # Add messages to session
-        await session_service.add_message(db, session_id, "human", message_data.content)
-        await session_service.add_message(db, session_id, "assistant", response.response)
+        async with async_session_factory() as db:
+            await session_service.add_messages(db, session_id, [
+                ("human", message_data.content),
+                ("assistant", response.response),
+            ])
+            await db.commit()
         
         # Return response
         return response
@@ -497,14 +625,19 @@ async def send_message(
         # Re-raise HTTP exceptions
         raise
     except Exception as e:
-        logger.error(f"Error sending message: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"Error sending message: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error sending message: {str(e)}"
         )
 
 
+async def _probe_db() -> None:
+    """Check out an engine connection and run SELECT 1."""
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
 @app.get(
     "/health",
     tags=["System"],
@@ -513,23 +646,39 @@ async def send_message(
     response_description="Health status of the API.",
     status_code=status.HTTP_200_OK
 )
-async def health_check(db: AsyncSession = Depends(get_db)):
+async def health_check():
     """Health check endpoint that verifies database connectivity."""
-    try:
-        # Try a simple database query to verify connectivity
-        await db.execute(text("SELECT 1"))
+    global _last_db_ok
+    
+    # Reuse a recent successful check so frequent probes don't drain the pool
+    if time.monotonic() - _last_db_ok < settings.health_check_cache_seconds:
         db_status = "connected"
-    except Exception as e:
-        logger.error(f"Database health check failed: {str(e)}")
-        db_status = "disconnected"
+    else:
+        try:
+            # Try a simple database query to verify connectivity; the timeout
+            # also covers waiting for a pooled connection
+            await asyncio.wait_for(_probe_db(), timeout=settings.health_check_timeout_seconds)
+            _last_db_ok = time.monotonic()
+            db_status = "connected"
+        except asyncio.TimeoutError:
+            logger.error(f"Database health check timed out after {settings.health_check_timeout_seconds}s")
+            db_status = "disconnected"
+        except Exception as e:
+            logger.error(f"Database health check failed: {str(e)}")
+            db_status = "disconnected"
     
     return {
         "status": "healthy" if db_status == "connected" else "unhealthy",
         "version": settings.app_version,
-        "database": db_status
+        "database": db_status,
+        "pool": engine.pool.status()
     }
 
 
+# Built once; the response carries no per-request state
+_ROOT_REDIRECT = RedirectResponse(url="/api/docs", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+
 @app.get(
     "/", 
     tags=["System"],
@@ -539,9 +688,27 @@ async def health_check(db: AsyncSession = Depends(get_db)):
 )
 async def root():
     """Redirect to API documentation."""
-    return RedirectResponse(url="/api/docs")
+    return _ROOT_REDIRECT
+
+
+@app.get("/api/openapi.json", include_in_schema=False)
+async def openapi_spec() -> Response:
+    """Serve the OpenAPI spec serialized at startup."""
+    return Response(content=app.state.openapi_bytes, media_type="application/json")
+
+
+@app.get("/api/docs", include_in_schema=False)
+async def swagger_ui() -> HTMLResponse:
+    """Serve the Swagger UI documentation page."""
+    return get_swagger_ui_html(openapi_url="/api/openapi.json", title=f"{app.title} - Swagger UI")
+
+
+@app.get("/api/redoc", include_in_schema=False)
+async def redoc() -> HTMLResponse:
+    """Serve the ReDoc documentation page."""
+    return get_redoc_html(openapi_url="/api/openapi.json", title=f"{app.title} - ReDoc")
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("src.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run("src.main:app", host="0.0.0.0", port=8000, reload=True, loop="uvloop", http="httptools")
\ No newline at end of file
@@ -10,14 +10,16 @@
 # Data Structure Diagram:
 # - AIProvider (Enum): CLAUDE, GEMINI
 # - Message: role, content
-# - PromptRequest: prompt, ai_provider, model, parameters
+# - PromptRequest: prompt, ai_provider, model, parameters, stream
 # - PromptResponse: response, ai_provider, model, usage, metadata
 # - SessionCreate: ai_provider, model, system_prompt
 # - SessionResponse: id, ai_provider, model, system_prompt, created_at, updated_at
-# - MessageCreate: role, content
+# - MessageCreate: role, content, stream
+# - MessageResponse: id, role, content, created_at, order
 #
 # Dependencies:
 # - pydantic
+# - pydantic_core
 # - enum
 # - typing
 # - uuid
@@ -28,7 +30,28 @@ from enum import Enum
 from typing import Dict, Any, Optional, List
 from uuid import UUID
 from datetime import datetime
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic_core import PydanticCustomError
+
+
+# Known numeric AI parameters and their types; clients often send them as strings
+_PARAMETER_CASTS = {"max_tokens": int, "temperature": float}
+
+
+def _cast_parameters(parameters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Cast known numeric AI parameters to the types the provider APIs expect."""
+    if not parameters:
+        return parameters
+    for name, cast in _PARAMETER_CASTS.items():
+        value = parameters.get(name)
+        if value is not None:
+            try:
+                parameters[name] = cast(value)
+            except (ValueError, TypeError):
+                raise PydanticCustomError(
+                    "invalid_parameter", "Invalid value provided for {name}", {"name": name}
+                )
+    return parameters
 
 
 class AIProvider(str, Enum):
@@ -45,19 +68,17 @@ class Message(BaseModel):
 
 class PromptRequest(BaseModel):
     """Model for prompt request data validation."""
+    model_config = ConfigDict(extra="ignore")  # Allow extra fields to be ignored instead of raising an error
+    
     system_prompt: str = Field(..., description="The system prompt that provides context and instructions to the AI")
     human_input: str = Field(..., description="The current human/user input to respond to")
     conversation_history: Optional[List[Message]] = Field(default_factory=list, description="Previous messages in the conversation (optional)")
     ai_provider: AIProvider = Field(..., description="The AI provider to use")
     model: Optional[str] = Field(None, description="Specific model to use (if applicable)")
     parameters: Optional[Dict[str, Any]] = Field(None, description="Additional parameters for the AI request")
+    stream: bool = Field(False, description="Stream the response as server-sent events")
     
-    class Config:
-        """Configuration for the PromptRequest model."""
-        json_encoders = {
-            # Custom encoders if needed
-        }
-        extra = "ignore"  # Allow extra fields to be ignored instead of raising an error
+    _cast_parameters = field_validator("parameters")(_cast_parameters)
 
 
 class PromptResponse(BaseModel):
@@ -87,26 +108,30 @@ class MessageCreate(BaseModel):
     """Model for creating a new message in a session."""
     content: str = Field(..., description="The content of the message")
     parameters: Optional[Dict[str, Any]] = Field(None, description="Additional parameters for the AI request")
+    stream: bool = Field(False, description="Stream the response as server-sent events")
+    
+    _cast_parameters = field_validator("parameters")(_cast_parameters)
 
 
 class MessageResponse(BaseModel):
     """Model for a message response."""
+    model_config = ConfigDict(from_attributes=True)
+    
     id: UUID = Field(..., description="Unique identifier for the message")
     role: str = Field(..., description="The role of the message sender")
     content: str = Field(..., description="The content of the message")
     created_at: datetime = Field(..., description="When the message was created")
+    order: int = Field(..., description="Position of the message in the session; pass as 'after' to fetch the next page")
 
 
 class SessionResponse(BaseModel):
     """Model for session response."""
+    model_config = ConfigDict(from_attributes=True)
+    
     id: UUID = Field(..., description="Unique identifier for the session")
     ai_provider: AIProvider = Field(..., description="The AI provider used for this session")
     model: str = Field(..., description="The specific model used for this session")
     system_prompt: str = Field(..., description="The system prompt for this session")
     created_at: datetime = Field(..., description="When the session was created")
     updated_at: datetime = Field(..., description="When the session was last updated")
-    messages: List[MessageResponse] = Field(default_factory=list, description="Messages in this session")
-    
-    class Config:
-        """Configuration for the SessionResponse model."""
-        from_attributes = True
\ No newline at end of file
+    messages: List[MessageResponse] = Field(default_factory=list, description="Messages in this session")
\ No newline at end of file
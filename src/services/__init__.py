@@ -16,5 +16,6 @@
 from src.services.ai_service import AIService
 from src.services.claude_service import ClaudeService
 from src.services.gemini_service import GeminiService
+from src.services.semantic_cache_service import CachedAIService, load_semantic_cache
 
-__all__ = ['AIService', 'ClaudeService', 'GeminiService']
\ No newline at end of file
+__all__ = ['AIService', 'ClaudeService', 'GeminiService', 'CachedAIService', 'load_semantic_cache']
\ No newline at end of file
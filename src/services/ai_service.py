@@ -12,6 +12,9 @@
 # |       AIService         |
 # +-------------------------+
 # | +generate_response()    |
+# | +generate_response_     |
+# |   stream()              |
+# | +aclose()               |
 # +-------------------------+
 #
 # Dependencies:
@@ -21,7 +24,7 @@
 ########################################################################
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, AsyncIterator
 
 from src.models import PromptRequest, PromptResponse
 
@@ -32,4 +35,13 @@ class AIService(ABC):
     @abstractmethod
     async def generate_response(self, request: PromptRequest) -> PromptResponse:
         """Generate a response from the AI service based on the prompt request."""
+        pass
+    
+    @abstractmethod
+    def generate_response_stream(self, request: PromptRequest) -> AsyncIterator[str]:
+        """Stream the response text from the AI service as it is generated."""
+        pass
+    
+    async def aclose(self) -> None:
+        """Release any resources (e.g. HTTP clients) held by the service."""
         pass
\ No newline at end of file
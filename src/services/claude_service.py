@@ -12,28 +12,48 @@
 # |       AIService         |     |     ClaudeService      |
 # +-------------------------+     +-------------------------+
 # | +generate_response()    |<|-- | +__init__()            |
-# +-------------------------+     | +generate_response()   |
+# | +generate_response_     |     | +generate_response()   |
+# |   stream()              |     | +generate_response_    |
+# | +aclose()               |     |   stream()             |
+# +-------------------------+     | +aclose()              |
 #                                 +-------------------------+
 #
 # Dependencies:
 # - os
 # - typing
 # - anthropic
+# - httpx
+# - config module
 # - models module
 # - services.ai_service module
 ########################################################################
 """
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
 import anthropic
-from anthropic import Anthropic
+import httpx
+from anthropic import AsyncAnthropic
 import logging
 
+from src.config import settings
 from src.models import PromptRequest, PromptResponse, AIProvider
 from src.services.ai_service import AIService
 
 logger = logging.getLogger(__name__)
 
+# Prompt caching: blocks marked ephemeral are cached by Anthropic, so a
+# repeated system prompt and conversation prefix are not re-processed
+_CACHE_CONTROL = {"type": "ephemeral"}
+_PROMPT_CACHING_HEADERS = {"anthropic-beta": "prompt-caching-2024-07-31"}
+
+# Conversation roles mapped to Messages API roles; session mode stores the
+# user's turns as "human"
+_CLAUDE_ROLES = {"user": "user", "human": "user", "assistant": "assistant"}
+
+# Most recent user turns marked as cache breakpoints (the API allows four
+# breakpoints per request, one is used by the system prompt)
+_CACHED_USER_TURNS = 2
+
 class ClaudeService(AIService):
     """Service for interacting with Anthropic's Claude AI."""
     
@@ -42,62 +62,75 @@ class ClaudeService(AIService):
         self.api_key = api_key or os.environ.get("ANTHROPIC_API_KEY")
         if not self.api_key:
             raise ValueError("Anthropic API key is required. Set ANTHROPIC_API_KEY environment variable or pass it directly.")
-        self.client = Anthropic(api_key=self.api_key)
+        # Native async client on one HTTP/2 keep-alive pool per process:
+        # concurrent calls share a few TLS connections on the event loop
+        self.client = AsyncAnthropic(
+            api_key=self.api_key,
+            http_client=httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=settings.ai_http_max_connections,
+                    max_keepalive_connections=settings.ai_http_max_keepalive_connections,
+                    keepalive_expiry=settings.ai_http_keepalive_expiry,
+                ),
+                # Fail fast on an unreachable endpoint; responses may take minutes
+                timeout=httpx.Timeout(settings.ai_http_timeout, connect=settings.ai_http_connect_timeout),
+            ),
+        )
     
-    async def generate_response(self, request: PromptRequest) -> PromptResponse:
-        """Generate a response from Claude based on the prompt request."""
+    def _build_request(self, request: PromptRequest) -> Tuple[str, List[Dict[str, Any]], Dict[str, Any]]:
+        """Build the model name, messages and API parameters (including the system prompt) for a Claude call."""
         # Set default model if not provided
         model = request.model or "claude-3-sonnet-20240229"
         
-        # Prepare parameters
-        parameters = request.parameters or {}
-        
-        # Prepare messages for Claude API
-        messages = []
-        
-        # Add conversation history if provided
-        if request.conversation_history:
-            for message in request.conversation_history:
-                if message.role.lower() in ['user', 'assistant']:
-                    messages.append({
-                        "role": message.role.lower(),
-                        "content": message.content
-                    })
-                else:
-                    logger.warning(f"Unsupported role '{message.role}' in conversation history for Claude, skipping.")
-                    continue
+        # Prepare messages for Claude API from the conversation history
+        history = request.conversation_history or ()
+        messages = [
+            {"role": role, "content": message.content}
+            for message in history
+            for role in (_CLAUDE_ROLES.get(message.role.lower()),)
+            if role is not None
+        ]
+        if len(messages) != len(history):
+            logger.warning(f"Skipped {len(history) - len(messages)} messages with unsupported roles in conversation history for Claude.")
         
         # Add the current human input
-        messages.append({
-            "role": "user",
-            "content": request.human_input
-        })
+        messages.append({"role": "user", "content": request.human_input})
+        
+        # Mark the latest user turns so the conversation prefix is cached
+        # incrementally from one request to the next
+        marked = 0
+        for message in reversed(messages):
+            if marked == _CACHED_USER_TURNS:
+                break
+            if message["role"] == "user":
+                message["content"] = [
+                    {"type": "text", "text": message["content"], "cache_control": _CACHE_CONTROL}
+                ]
+                marked += 1
         
-        # Prepare parameters, ensuring correct types for known numeric fields
-        api_params = request.parameters.copy() if request.parameters else {}
+        # Prepare parameters (numeric fields are already cast by PromptRequest).
+        # A fresh dict is always needed since the system prompt is added below.
+        api_params = dict(request.parameters) if request.parameters else {}
 
-        # Cast max_tokens to int
-        if 'max_tokens' in api_params and api_params['max_tokens'] is not None:
-            try:
-                api_params['max_tokens'] = int(api_params['max_tokens'])
-            except (ValueError, TypeError):
-                logger.warning(f"Could not convert max_tokens '{api_params['max_tokens']}' to int. Raising error.")
-                raise ValueError("Invalid value provided for max_tokens")
+        # System prompt as a cacheable block (empty text blocks are rejected)
+        if request.system_prompt:
+            api_params['system'] = [
+                {"type": "text", "text": request.system_prompt, "cache_control": _CACHE_CONTROL}
+            ]
 
-        # Cast temperature to float
-        if 'temperature' in api_params and api_params['temperature'] is not None:
-            try:
-                api_params['temperature'] = float(api_params['temperature'])
-            except (ValueError, TypeError):
-                logger.warning(f"Could not convert temperature '{api_params['temperature']}' to float. Raising error.")
-                raise ValueError("Invalid value provided for temperature")
+        return model, messages, api_params
+    
+    async def generate_response(self, request: PromptRequest) -> PromptResponse:
+        """Generate a response from Claude based on the prompt request."""
+        model, messages, api_params = self._build_request(request)
 
         try:
-            logger.debug(f"Calling Claude API with model: {model}, system_prompt: {request.system_prompt is not None}, num_messages: {len(messages)}, params: {api_params}")
-            response = self.client.messages.create(
+            logger.debug(f"Calling Claude API with model: {model}, system_prompt: {bool(request.system_prompt)}, num_messages: {len(messages)}, params: {api_params}")
+            response = await self.client.messages.create(
                 model=model,
-                system=request.system_prompt, 
                 messages=messages,
+                extra_headers=_PROMPT_CACHING_HEADERS,
                 **api_params 
             )
             logger.debug(f"Claude API response received. Usage: {response.usage}")
@@ -112,7 +145,10 @@ class ClaudeService(AIService):
                 model=model,
                 usage={
                     "input_tokens": response.usage.input_tokens,
-                    "output_tokens": response.usage.output_tokens
+                    "output_tokens": response.usage.output_tokens,
+                    # Not declared by this SDK version; read from the raw payload
+                    "cache_creation_input_tokens": getattr(response.usage, "cache_creation_input_tokens", None),
+                    "cache_read_input_tokens": getattr(response.usage, "cache_read_input_tokens", None),
                 },
                 metadata={
                     "message_id": response.id,
@@ -121,4 +157,31 @@ class ClaudeService(AIService):
             )
         except Exception as e:
             logger.error(f"Error generating response from Claude: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    async def generate_response_stream(self, request: PromptRequest) -> AsyncIterator[str]:
+        """Stream response text from Claude as it is generated."""
+        model, messages, api_params = self._build_request(request)
+
+        try:
+            logger.debug(f"Streaming from Claude API with model: {model}, num_messages: {len(messages)}, params: {api_params}")
+            stream = await self.client.messages.create(
+                model=model,
+                messages=messages,
+                stream=True,
+                extra_headers=_PROMPT_CACHING_HEADERS,
+                **api_params
+            )
+            try:
+                async for event in stream:
+                    if event.type == "content_block_delta" and event.delta.type == "text_delta":
+                        yield event.delta.text
+            finally:
+                await stream.close()
+        except Exception as e:
+            logger.error(f"Error streaming response from Claude: {str(e)}")
+            raise
+    
+    async def aclose(self) -> None:
+        """Close the underlying Anthropic HTTP client and its connection pool."""
+        await self.client.close()
\ No newline at end of file
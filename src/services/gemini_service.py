@@ -12,27 +12,62 @@
 # |       AIService         |     |     GeminiService      |
 # +-------------------------+     +-------------------------+
 # | +generate_response()    |<|-- | +__init__()            |
-# +-------------------------+     | +generate_response()   |
-#                                 +-------------------------+
+# | +generate_response_     |     | +generate_response()   |
+# |   stream()              |     | +generate_response_    |
+# | +aclose()               |     |   stream()             |
+# +-------------------------+     +-------------------------+
 #
 # Dependencies:
+# - asyncio
+# - hashlib
+# - json
 # - os
+# - time
+# - collections
+# - datetime
 # - typing
 # - google.generativeai
+# - config module
 # - models module
 # - services.ai_service module
 ########################################################################
 """
+import asyncio
+import hashlib
+import json
 import os
-from typing import Dict, Any, Optional
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
 import google.generativeai as genai
+from google.generativeai import caching
 import logging
 
+from src.config import settings
 from src.models import PromptRequest, PromptResponse, AIProvider
 from src.services.ai_service import AIService
 
 logger = logging.getLogger(__name__)
 
+# Rough characters-per-token ratio, used to decide whether a conversation is
+# large enough for Gemini context caching without a count_tokens round-trip
+_CHARS_PER_TOKEN = 4
+
+# Conversation roles sent as Gemini "user" turns; all others are "model"
+_GEMINI_USER_ROLES = frozenset({"human", "user"})
+
+# Gemini 1.0 models reject system instructions; for these the system prompt
+# is sent as the start of the first user turn instead
+_LEGACY_MODEL_PREFIXES = ("gemini-pro", "gemini-1.0")
+
+# Do not reuse a context cache this close to its expiry
+_CACHE_EXPIRY_MARGIN = timedelta(seconds=60)
+
+# GenerativeModel instances kept per process (they bind a system instruction,
+# so the number of distinct instances follows the number of system prompts)
+_MODEL_CACHE_SIZE = 256
+
 class GeminiService(AIService):
     """Service for interacting with Google's Gemini AI."""
     
@@ -42,67 +77,164 @@ class GeminiService(AIService):
         if not self.api_key:
             raise ValueError("Google API key is required. Set GOOGLE_API_KEY environment variable or pass it directly.")
         genai.configure(api_key=self.api_key)
+        
+        # Context caches by conversation key as (cache, cached turns, digest of
+        # those turns), LRU order (only touched from the event loop, so no
+        # locking is needed)
+        self._context_caches: "OrderedDict[str, Tuple[caching.CachedContent, int, str]]" = OrderedDict()
+        # Conversation keys seen once over the size threshold, oldest first
+        self._cache_candidates: "OrderedDict[str, None]" = OrderedDict()
+        # Models whose cache creation failed, with the time to retry
+        self._cache_failures: Dict[str, float] = {}
+        
+        # GenerativeModel instances by (model, system prompt) or cache name, LRU order
+        self._models: "OrderedDict[Tuple[str, Optional[str]], genai.GenerativeModel]" = OrderedDict()
     
-    async def generate_response(self, request: PromptRequest) -> PromptResponse:
-        """Generate a response from Gemini based on the prompt request."""
-        # Set default model if not provided
-        model = request.model or "gemini-pro"
+    def _get_model(
+        self,
+        model: str,
+        system_prompt: Optional[str],
+        cache: Optional[caching.CachedContent] = None
+    ) -> genai.GenerativeModel:
+        """Return a reusable GenerativeModel for the model and system prompt (or context cache)."""
+        key = ("cached", cache.name) if cache is not None else (model, system_prompt)
+        gemini_model = self._models.get(key)
+        if gemini_model is not None:
+            self._models.move_to_end(key)
+            return gemini_model
         
-        # Prepare parameters
-        parameters = request.parameters or {}
+        if cache is not None:
+            gemini_model = genai.GenerativeModel.from_cached_content(cache)
+        else:
+            gemini_model = genai.GenerativeModel(model_name=model, system_instruction=system_prompt)
+        
+        self._models[key] = gemini_model
+        while len(self._models) > _MODEL_CACHE_SIZE:
+            self._models.popitem(last=False)
+        return gemini_model
+    
+    @staticmethod
+    def _digest(value: Any) -> str:
+        """Stable short hash of a JSON-serializable value."""
+        return hashlib.blake2b(json.dumps(value).encode(), digest_size=16).hexdigest()
+    
+    async def _get_context_cache(
+        self,
+        model: str,
+        system_prompt: Optional[str],
+        history: List[Dict[str, Any]]
+    ) -> Tuple[Optional[caching.CachedContent], int]:
+        """
+        Return a Gemini context cache holding the system prompt and a prefix of the history.
+        
+        Conversations are identified by (model, system prompt, first turn),
+        which stays the same as a session grows. A live cache is reused as long
+        as the history still starts with the turns it holds; only the turns
+        after them are sent. A cache is created the second time a conversation
+        is seen over the API's minimum cacheable size, so one-off requests are
+        not billed for cache storage. Models that fail cache creation are not
+        retried until the cache TTL has passed.
+        
+        Returns:
+            Tuple of (cached content or None, number of history turns it holds)
+        """
+        key = self._digest([model, system_prompt, history[:1]])
+        
+        entry = self._context_caches.get(key)
+        if entry is not None:
+            cache, cached_turns, prefix_digest = entry
+            if (
+                cache.expire_time - _CACHE_EXPIRY_MARGIN > datetime.now(timezone.utc)
+                and len(history) >= cached_turns
+                and self._digest(history[:cached_turns]) == prefix_digest
+            ):
+                self._context_caches.move_to_end(key)
+                return cache, cached_turns
+            # Expired or the history was rewritten; replaced below if still large enough
+            del self._context_caches[key]
+        
+        size = len(system_prompt or "") + sum(len(part) for turn in history for part in turn["parts"])
+        if size < settings.gemini_context_cache_min_tokens * _CHARS_PER_TOKEN:
+            return None, 0
         
-        # Get the model
-        gemini_model = genai.GenerativeModel(model_name=model)
+        if self._cache_failures.get(model, 0.0) > time.monotonic():
+            return None, 0
         
-        # Prepare chat session
-        chat = gemini_model.start_chat()
+        # Only create once the conversation has come back at least once
+        if key not in self._cache_candidates:
+            self._cache_candidates[key] = None
+            while len(self._cache_candidates) > settings.gemini_context_cache_size:
+                self._cache_candidates.popitem(last=False)
+            return None, 0
+        del self._cache_candidates[key]
         
-        # Add system prompt as the first message
-        chat.send_message(f"System: {request.system_prompt}")
+        try:
+            # The SDK has no async variant of cache creation
+            cache = await asyncio.to_thread(
+                caching.CachedContent.create,
+                model=model,
+                system_instruction=system_prompt,
+                contents=history,
+                ttl=timedelta(seconds=settings.gemini_context_cache_ttl_seconds),
+            )
+        except Exception as e:
+            # e.g. a model without caching support; fall back to plain requests
+            logger.warning(f"Could not create Gemini context cache for model {model}: {str(e)}")
+            self._cache_failures[model] = time.monotonic() + settings.gemini_context_cache_ttl_seconds
+            return None, 0
+        
+        self._context_caches[key] = (cache, len(history), self._digest(history))
+        # Evicted caches are left to expire server-side via their TTL
+        while len(self._context_caches) > settings.gemini_context_cache_size:
+            self._context_caches.popitem(last=False)
+        return cache, len(history)
+    
+    async def _prepare_request(self, request: PromptRequest) -> Tuple[Any, List[Dict[str, Any]], str, Any, Any]:
+        """
+        Build the model and contents for a single generate_content call.
+        
+        The system prompt is sent as the model's system instruction (or, for
+        Gemini 1.0 models, prefixed to the first user turn) and the
+        conversation history as prior turns, served from a context cache when
+        the conversation is large enough.
+        
+        Returns:
+            Tuple of (generative model, contents, model name, generation config, safety settings)
+        """
+        # Set default model if not provided
+        model = request.model or settings.default_gemini_model
         
-        # Add conversation history if provided
-        if request.conversation_history:
-            for message in request.conversation_history:
-                role_prefix = "Human: " if message.role == "human" else "Assistant: "
-                chat.send_message(f"{role_prefix}{message.content}")
+        # Prepare parameters
+        parameters = request.parameters or {}
+        
+        # Conversation history as Gemini turns
+        history = [
+            {
+                "role": "user" if message.role in _GEMINI_USER_ROLES else "model",
+                "parts": [message.content],
+            }
+            for message in request.conversation_history or []
+        ]
+        system_prompt = request.system_prompt or None
+        user_turn = {"role": "user", "parts": [request.human_input]}
         
-        # Prepare generation config from parameters, ensuring max_tokens is int
+        # Prepare generation config from parameters
         generation_config = {}
         safety_settings = {}
         if request.parameters:
             # Separate standard GenerationConfig fields from others like safety_settings
             allowed_gen_config_keys = {"temperature", "top_p", "top_k", "max_output_tokens", "candidate_count", "stop_sequences"}
+            # Numeric fields (temperature, max_tokens) are already cast by PromptRequest
             gen_config_params = {k: v for k, v in request.parameters.items() if k in allowed_gen_config_keys}
 
-            # Cast temperature to float
-            if 'temperature' in gen_config_params and gen_config_params['temperature'] is not None:
-                try:
-                    gen_config_params['temperature'] = float(gen_config_params['temperature'])
-                except (ValueError, TypeError):
-                    logger.warning(f"Could not convert temperature '{gen_config_params['temperature']}' to float for Gemini. Raising error.")
-                    # Optionally remove it or raise error
-                    # del gen_config_params['temperature']
-                    raise ValueError("Invalid value provided for temperature")
-
-            # Rename max_tokens to max_output_tokens for Gemini and cast to int
+            # Rename max_tokens to max_output_tokens for Gemini
             if 'max_tokens' in request.parameters:
-                # Check if max_tokens value is suitable for conversion
                 max_tokens_val = request.parameters['max_tokens']
                 if max_tokens_val is not None:
-                    try:
-                        gen_config_params['max_output_tokens'] = int(max_tokens_val)
-                    except (ValueError, TypeError):
-                         logger.warning(f"Could not convert max_tokens '{max_tokens_val}' to int for Gemini. Raising error.")
-                         # Optionally remove it or raise error
-                         # del gen_config_params['max_output_tokens']
-                         raise ValueError("Invalid value provided for max_tokens")
+                    gen_config_params['max_output_tokens'] = max_tokens_val
                 elif 'max_output_tokens' in gen_config_params: # remove if None was passed
                      del gen_config_params['max_output_tokens']
 
-            # Remove max_tokens if it exists after potential rename
-            if 'max_tokens' in gen_config_params:
-                del gen_config_params['max_tokens']
-
             logger.debug(f"Processed Gemini GenConfig params: {gen_config_params}")
             generation_config = genai.types.GenerationConfig(**gen_config_params)
 
@@ -111,8 +243,33 @@ class GeminiService(AIService):
                 safety_settings = request.parameters["safety_settings"]
                 logger.debug(f"Using custom safety settings: {safety_settings}")
 
-        # Send the current human input and get response
-        response = chat.send_message(f"Human: {request.human_input}", generation_config=generation_config, safety_settings=safety_settings)
+        # Gemini 1.0 has neither system instructions nor context caching;
+        # turns must alternate, so the prompt joins the first user turn
+        if model.startswith(_LEGACY_MODEL_PREFIXES):
+            turns = history + [user_turn]
+            if system_prompt:
+                first = next(turn for turn in turns if turn["role"] == "user")
+                turns[turns.index(first)] = {"role": "user", "parts": [f"System: {system_prompt}"] + first["parts"]}
+            return self._get_model(model, None), turns, model, generation_config, safety_settings
+        
+        # Get the model; a context cache already holds the system prompt and
+        # the first cached_turns of the history
+        cache, cached_turns = await self._get_context_cache(model, system_prompt, history) if history else (None, 0)
+        gemini_model = self._get_model(model, system_prompt, cache)
+        contents = history[cached_turns:] + [user_turn]
+        
+        return gemini_model, contents, model, generation_config, safety_settings
+    
+    async def generate_response(self, request: PromptRequest) -> PromptResponse:
+        """Generate a response from Gemini based on the prompt request."""
+        gemini_model, contents, model, generation_config, safety_settings = await self._prepare_request(request)
+        
+        # Send the whole conversation in one request and get response
+        response = await gemini_model.generate_content_async(
+            contents,
+            generation_config=generation_config,
+            safety_settings=safety_settings
+        )
         
         # Check for blocked response due to safety
         if not response.candidates:
@@ -133,8 +290,32 @@ class GeminiService(AIService):
             response=content,
             ai_provider=AIProvider.GEMINI,
             model=model,
-            usage={},  # Gemini might not provide token counts in the same way
+            usage={
+                "prompt_token_count": response.usage_metadata.prompt_token_count,
+                "candidates_token_count": response.usage_metadata.candidates_token_count,
+                "cached_content_token_count": response.usage_metadata.cached_content_token_count,
+            },
             metadata={
                 "model": model
             }
-        )
\ No newline at end of file
+        )
+    
+    async def generate_response_stream(self, request: PromptRequest) -> AsyncIterator[str]:
+        """Stream response text from Gemini as it is generated."""
+        gemini_model, contents, model, generation_config, safety_settings = await self._prepare_request(request)
+        
+        response = await gemini_model.generate_content_async(
+            contents,
+            generation_config=generation_config,
+            safety_settings=safety_settings,
+            stream=True
+        )
+        async for chunk in response:
+            if not chunk.candidates:
+                block_reason = "Unknown safety block"
+                if chunk.prompt_feedback and chunk.prompt_feedback.block_reason:
+                    block_reason = chunk.prompt_feedback.block_reason.name
+                raise Exception(
+                    f"Request blocked by Gemini safety filters. Reason: {block_reason}"
+                )
+            yield chunk.text
@@ -0,0 +1,199 @@
+"""
+########################################################################
+# AI Prompt Service - services/semantic_cache_service.py
+# 
+# Origin: Created as part of the AI Prompt Service project
+# Request: Add a semantic response cache in front of AIService.generate_response
+# Version: 1.0.0
+# Created: 2026-10-15
+# 
+# UML Representation:
+# +-------------------------+     +-------------------------+
+# |       AIService         |     |    CachedAIService     |
+# +-------------------------+     +-------------------------+
+# | +generate_response()    |<|-- | +__init__()            |
+# | +generate_response_     |     | +generate_response()   |
+# |   stream()              |     | +generate_response_    |
+# | +aclose()               |     |   stream()             |
+# +-------------------------+     | +aclose()              |
+#                                 | +hits: int             |
+#                                 | +misses: int           |
+#                                 +-------------------------+
+#
+# Dependencies:
+# - asyncio
+# - hashlib
+# - importlib
+# - json
+# - time
+# - functools
+# - typing
+# - numpy (optional, with sentence-transformers)
+# - sentence-transformers (optional)
+# - config module
+# - models module
+# - services.ai_service module
+########################################################################
+"""
+import asyncio
+import hashlib
+import importlib
+import json
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, List, Optional
+import logging
+
+from src.config import settings
+from src.models import PromptRequest, PromptResponse
+from src.services.ai_service import AIService
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def _load_encoder(model_name: str) -> Callable[[str], Any]:
+    """Load a sentence-transformers model once per process and return its encode function."""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError as e:
+        raise ImportError(
+            "The semantic cache requires sentence-transformers. "
+            "Install it with 'pip install sentence-transformers' or set SEMANTIC_CACHE_ENABLED=false."
+        ) from e
+
+    encoder = SentenceTransformer(model_name)
+    return lambda text: encoder.encode(text, normalize_embeddings=True)
+
+
+async def load_semantic_cache() -> None:
+    """
+    Import numpy and load the configured encoder model off the event loop.
+
+    Should be called at application startup when the semantic cache is
+    enabled, so a missing dependency or model fails the boot, and requests
+    never wait on a model load (which may include a download).
+    """
+    await asyncio.to_thread(importlib.import_module, "numpy")
+    await asyncio.to_thread(_load_encoder, settings.semantic_cache_model)
+
+
+class CachedAIService(AIService):
+    """
+    Semantic response cache in front of another AI service.
+
+    A request is answered from the cache when an earlier request had the same
+    model, parameters, system prompt and conversation history, and a human
+    input whose embedding has cosine similarity above the threshold. Only
+    the human input is compared semantically: instructions that read alike
+    can still ask for different answers.
+    """
+
+    def __init__(
+        self,
+        service: AIService,
+        threshold: Optional[float] = None,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        encoder: Optional[Callable[[str], Any]] = None
+    ):
+        """
+        Wrap an AI service with a semantic cache.
+
+        Args:
+            service: The AI service to call on a cache miss
+            threshold: Minimum cosine similarity for a hit
+            ttl_seconds: Lifetime of a cached response
+            max_entries: Maximum cached responses; the oldest are evicted first
+            encoder: Function returning a unit-length embedding for a text
+                (defaults to the configured sentence-transformers model,
+                loaded by load_semantic_cache at startup)
+        """
+        import numpy as np
+
+        self.service = service
+        self.threshold = settings.semantic_cache_threshold if threshold is None else threshold
+        self.ttl_seconds = settings.semantic_cache_ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.max_entries = settings.semantic_cache_max_entries if max_entries is None else max_entries
+        self._encode = encoder or _load_encoder(settings.semantic_cache_model)
+        self._np = np
+
+        # Ring buffer of max_entries slots: row i of each array describes slot
+        # i, and the oldest slot is overwritten first. The embedding matrix is
+        # allocated on the first store, once the dimension is known.
+        self._vectors = None
+        self._keys = np.empty(self.max_entries, dtype="<U32")
+        self._created = np.full(self.max_entries, -np.inf)
+        self._responses: List[Optional[PromptResponse]] = [None] * self.max_entries
+        self._size = 0
+        self._next = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _partition_key(request: PromptRequest) -> str:
+        """Hash everything that must match exactly for a cached response to apply."""
+        history = [(message.role, message.content) for message in request.conversation_history or []]
+        payload = json.dumps(
+            [request.model, request.parameters, request.system_prompt, history],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    def _lookup(self, key: str, vector: Any, now: float) -> Optional[PromptResponse]:
+        """Return the most similar live cached response in the same partition, if above the threshold."""
+        if self._size == 0:
+            return None
+
+        np = self._np
+        live = (self._keys[:self._size] == key) & (now - self._created[:self._size] <= self.ttl_seconds)
+        if not live.any():
+            return None
+
+        # Embeddings are normalized, so the dot product is the cosine similarity
+        scores = np.where(live, self._vectors[:self._size] @ vector, -np.inf)
+        best = int(np.argmax(scores))
+        return self._responses[best] if scores[best] > self.threshold else None
+
+    def _store(self, key: str, vector: Any, response: PromptResponse, now: float) -> None:
+        """Add a response to the cache, overwriting the oldest slot when full."""
+        if self._vectors is None:
+            self._vectors = self._np.zeros((self.max_entries, vector.shape[-1]), dtype=vector.dtype)
+
+        slot = self._next
+        self._vectors[slot] = vector
+        self._keys[slot] = key
+        self._created[slot] = now
+        self._responses[slot] = response
+        self._next = (slot + 1) % self.max_entries
+        self._size = min(self._size + 1, self.max_entries)
+
+    async def generate_response(self, request: PromptRequest) -> PromptResponse:
+        """Return a cached response for a semantically equivalent request, or generate one."""
+        key = self._partition_key(request)
+
+        # Embedding is CPU-bound; keep it off the event loop
+        vector = await asyncio.to_thread(self._encode, request.human_input)
+
+        cached = self._lookup(key, vector, time.monotonic())
+        if cached is not None:
+            self.hits += 1
+            logger.debug(f"Semantic cache hit (hits={self.hits}, misses={self.misses})")
+            return cached.model_copy(
+                update={"metadata": {**(cached.metadata or {}), "semantic_cache_hit": True}}
+            )
+
+        self.misses += 1
+        response = await self.service.generate_response(request)
+        self._store(key, vector, response, time.monotonic())
+        return response
+
+    def generate_response_stream(self, request: PromptRequest) -> AsyncIterator[str]:
+        """Stream from the wrapped service; streamed responses are not cached."""
+        return self.service.generate_response_stream(request)
+
+    async def aclose(self) -> None:
+        """Release the wrapped service's resources."""
+        await self.service.aclose()
@@ -13,16 +13,22 @@
 # +-------------------------+
 # | +create_session()       |
 # | +get_session()          |
+# | +get_session_with_      |
+# |   messages()            |
 # | +update_session()       |
-# | +add_message()          |
+# | +add_messages()         |
+# | +bulk_insert_messages() |
 # | +delete_session()       |
 # | +cleanup_old_sessions() |
+# | +fetch_session()        |
+# | +fetch_messages()       |
 # +-------------------------+
 #
 # Dependencies:
 # - uuid
 # - datetime
 # - sqlalchemy
+# - asyncpg
 # - models
 # - db_models
 # - config
@@ -30,19 +36,35 @@
 """
 import logging
 from uuid import UUID
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional, List, Tuple
 
-from sqlalchemy import select, delete, func
+import asyncpg
+from sqlalchemy import Integer, column, select, delete, insert, update, func, text, true, values
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
 
 from src.models import Message as MessageModel, AIProvider, SessionCreate, SessionUpdate
-from src.db_models import Session, Message
-from src.config import settings
+from src.db_models import Session, Message, uuid7
+from src.config import settings, SESSION_EXPIRY_HOURS
 
 logger = logging.getLogger(__name__)
 
+# Raw SQL for hot read paths (prepared and cached per connection by asyncpg)
+# IDs are returned as text so the rows can be serialized with orjson as-is
+# (it rejects asyncpg's UUID subclass)
+_FETCH_SESSION_SQL = (
+    "SELECT id::text AS id, ai_provider, model, system_prompt, created_at, updated_at "
+    "FROM sessions WHERE id = $1"
+)
+# Keyset pagination on (session_id, "order"), served by ix_messages_session_order;
+# LIMIT NULL returns all remaining rows
+_FETCH_MESSAGES_SQL = (
+    'SELECT id::text AS id, role, content, created_at, "order" FROM messages '
+    'WHERE session_id = $1 AND "order" > $2 ORDER BY "order" LIMIT $3'
+)
+
 class SessionService:
     """Service for managing conversation sessions."""
     
@@ -74,7 +96,8 @@ class SessionService:
         session = Session(
             ai_provider=session_data.ai_provider,
             model=model,
-            system_prompt=session_data.system_prompt
+            system_prompt=session_data.system_prompt,
+            messages=[]  # Loaded (empty) collection, so responses need no lazy load
         )
         
         db.add(session)
@@ -110,6 +133,35 @@ class SessionService:
             
         return session
     
+    async def get_session_with_messages(
+        self, 
+        db: AsyncSession,
+        session_id: UUID
+    ) -> Optional[Session]:
+        """
+        Get a session by ID with its messages eagerly loaded.
+        
+        Args:
+            db: Database session
+            session_id: The ID of the session to retrieve
+            
+        Returns:
+            The session object, with messages ordered by order field,
+            or None if not found
+        """
+        result = await db.execute(
+            select(Session)
+            .where(Session.id == session_id)
+            .options(selectinload(Session.messages))
+        )
+        session = result.scalars().first()
+        
+        if not session:
+            logger.warning(f"Session not found: {session_id}")
+            return None
+            
+        return session
+    
     async def update_session(
         self,
         db: AsyncSession,
@@ -125,71 +177,122 @@ class SessionService:
             update_data: The data to update
             
         Returns:
-            The updated session or None if not found
+            The updated session (with messages loaded) or None if not found
         """
-        session = await self.get_session(db, session_id)
-        if not session:
-            return None
-            
         # Update fields if provided
+        values = {"updated_at": func.now()}
         if update_data.system_prompt is not None:
-            session.system_prompt = update_data.system_prompt
+            values["system_prompt"] = update_data.system_prompt
             
         if update_data.model is not None:
-            session.model = update_data.model
-            
-        session.updated_at = datetime.utcnow()
-        await db.flush()
+            values["model"] = update_data.model
+        
+        # UPDATE ... RETURNING loads the session without a prior SELECT
+        result = await db.execute(
+            update(Session)
+            .where(Session.id == session_id)
+            .values(**values)
+            .returning(Session)
+            .options(selectinload(Session.messages))
+        )
+        session = result.scalars().first()
+        if not session:
+            logger.warning(f"Session not found: {session_id}")
+            return None
         
         logger.info(f"Updated session: {session_id}")
         return session
     
-    async def add_message(
+    async def add_messages(
         self,
         db: AsyncSession,
         session_id: UUID,
-        role: str,
-        content: str
-    ) -> Optional[Tuple[Session, Message]]:
+        messages: List[Tuple[str, str]]
+    ) -> Optional[List[Tuple[UUID, datetime]]]:
         """
-        Add a message to a session.
+        Add several messages to a session in one batch.
+        
+        Touches the session timestamp and inserts all messages in a single
+        statement (one round-trip), without loading the session first: a
+        data-modifying CTE updates the session and the INSERT selects from it
+        joined with the new rows, so nothing is inserted if the session does
+        not exist. Server-assigned values come back through RETURNING.
         
         Args:
             db: Database session
             session_id: The ID of the session
-            role: The role of the message sender (human or assistant)
-            content: The content of the message
+            messages: (role, content) pairs in conversation order
             
         Returns:
-            Tuple of (session, message) or None if session not found
+            (id, created_at) of each created message or None if session not found
         """
-        session = await self.get_session(db, session_id)
-        if not session:
-            return None
-            
-        # Get the next order number
+        touched = (
+            update(Session)
+            .where(Session.id == session_id)
+            .values(updated_at=func.now())
+            .returning(Session.id)
+            .cte("touched_session")
+        )
+        # IDs are generated here since Python-side defaults do not apply to
+        # INSERT ... SELECT; position keeps the rows in conversation order
+        new_messages = values(
+            column("id", Message.id.type),
+            column("role", Message.role.type),
+            column("content", Message.content.type),
+            column("position", Integer),
+            name="new_messages",
+        ).data([
+            (uuid7(), role, content, position)
+            for position, (role, content) in enumerate(messages)
+        ])
+        # Order is assigned by the database in position order
         result = await db.execute(
-            select(func.coalesce(func.max(Message.order), -1) + 1)
-            .where(Message.session_id == session_id)
+            insert(Message)
+            .from_select(
+                ["id", "session_id", "role", "content"],
+                select(new_messages.c.id, touched.c.id, new_messages.c.role, new_messages.c.content)
+                .select_from(touched)
+                .join(new_messages, true())
+                .order_by(new_messages.c.position)
+            )
+            .add_cte(touched)
+            .returning(Message.id, Message.created_at, Message.order)
         )
-        next_order = result.scalar()
+        created = [(row.id, row.created_at) for row in sorted(result, key=lambda row: row.order)]
+        if not created:
+            logger.warning(f"Session not found: {session_id}")
+            return None
         
-        # Create the message
-        message = Message(
-            session_id=session_id,
-            role=role,
-            content=content,
-            order=next_order
-        )
+        logger.info(f"Added {len(created)} messages to session {session_id}")
+        return created
+    
+    async def bulk_insert_messages(
+        self,
+        db: AsyncSession,
+        rows: List[dict]
+    ) -> int:
+        """
+        Insert many messages in a single batched statement.
         
-        db.add(message)
+        Intended for restoring or seeding conversations. Rows are inserted in
+        list order, so the database-assigned order follows it. Session
+        timestamps are not touched.
         
-        # Update session timestamp
-        session.updated_at = datetime.utcnow()
-        await db.flush()
+        Args:
+            db: Database session
+            rows: Message column values (session_id, role, content), all
+                with the same keys
+            
+        Returns:
+            Number of messages inserted
+        """
+        if not rows:
+            return 0
+            
+        await db.execute(insert(Message), rows)
         
-        logger.info(f"Added {role} message to session {session_id}")
-        return (session, message)
+        logger.info(f"Bulk inserted {len(rows)} messages")
+        return len(rows)
     
     async def delete_session(
         self,
@@ -223,11 +326,14 @@ class SessionService:
     async def cleanup_old_sessions(
         self,
         db: AsyncSession,
-        hours: int = settings.session_expiry_hours
+        hours: int = SESSION_EXPIRY_HOURS
     ) -> int:
         """
         Delete sessions older than the specified timeframe.
         
+        Runs as a single indexed DELETE evaluated against the database clock;
+        messages are removed by the foreign key's ON DELETE CASCADE.
+        
         Args:
             db: Database session
             hours: Hours of inactivity after which sessions are deleted
@@ -235,16 +341,15 @@ class SessionService:
         Returns:
             Number of sessions deleted
         """
-        cutoff = datetime.utcnow() - timedelta(hours=hours)
-        
         result = await db.execute(
-            delete(Session)
-            .where(Session.updated_at < cutoff)
-            .returning(Session.id)
+            text(
+                "DELETE FROM sessions "
+                "WHERE updated_at < now() - make_interval(hours => :hours)"
+            ),
+            {"hours": hours}
         )
-        deleted_ids = result.scalars().all()
-        
-        count = len(deleted_ids)
+        # Count from the command tag instead of returning every deleted id
+        count = result.rowcount
         if count > 0:
             logger.info(f"Cleaned up {count} old sessions")
             
@@ -271,4 +376,49 @@ class SessionService:
             .order_by(Message.order)
         )
         
-        return result.scalars().all()
\ No newline at end of file
+        return result.scalars().all()
+    
+    async def fetch_session(
+        self,
+        conn: asyncpg.Connection,
+        session_id: UUID
+    ) -> Optional[asyncpg.Record]:
+        """
+        Get a session row by ID using a raw asyncpg connection.
+        
+        Args:
+            conn: Raw asyncpg connection
+            session_id: The ID of the session to retrieve
+            
+        Returns:
+            The session record or None if not found
+        """
+        record = await conn.fetchrow(_FETCH_SESSION_SQL, session_id)
+        
+        if record is None:
+            logger.warning(f"Session not found: {session_id}")
+            
+        return record
+    
+    async def fetch_messages(
+        self,
+        conn: asyncpg.Connection,
+        session_id: UUID,
+        after: int = -1,
+        limit: Optional[int] = None
+    ) -> List[asyncpg.Record]:
+        """
+        Get message rows for a session using a raw asyncpg connection.
+        
+        Args:
+            conn: Raw asyncpg connection
+            session_id: The ID of the session
+            after: Only return messages whose order is greater than this
+                (the order of the last message of the previous page; -1 for
+                the first page, as pre-migration orders start at 0)
+            limit: Maximum number of messages to return (None for all)
+            
+        Returns:
+            List of message records ordered by order field
+        """
+        return await conn.fetch(_FETCH_MESSAGES_SQL, session_id, after, limit)